@@ -3,33 +3,57 @@ from tkinter import messagebox, filedialog
 import customtkinter as ctk
 import os
 import re
+import collections
+import functools
 import threading
-try:
-    from tkinterdnd2 import DND_FILES, TkinterDnD
-except ImportError:
-    TkinterDnD = None
-    DND_FILES = None
 import json
 
+# Patterns used by the parsing and simplifying steps, compiled once at import
+# _CLIPPING_RE matches a single entry, i.e. the text between two separators
+_CLIPPING_RE = re.compile(
+    r"\s*(?P<title>[^\n]*?) \((?P<author>[^\n]*?)\)\n- "
+    r"(?:Your Highlight on (?P<page>[^|\n]*?) \| location (?P<loc>[^|\n]*?)"
+    r"|Your Highlight at (?P<at_loc>location [^|\n]*?)"
+    r"|Your Highlight on (?P<on_page>page [^|\n]*?)"
+    r"|(?P<old_page>Highlight on Page [^|\n]*?)(?: \| (?P<old_loc>Loc\.[^|\n]*?))?)"
+    r"(?: \|[^\n]*)?\n\n(?P<text>.*)",
+    re.DOTALL
+)
+_BOOK_INFO_RE = re.compile(r'<([^>]*)>\(([^)]*)\)')
+_FILENAME_SANITIZE_RE = re.compile(r'[<>:"/\\|?*]')
+_PARA_SPLIT_RE = re.compile(r'\n{2,}')
+_META_TRAILER_RE = re.compile(
+    r'<.*?>\s*\(.*?\)\s*(Your Highlight on page \d+|Highlight on Page \d+ \| Loc\..*|Your Highlight at location \d+-\d+|Your Highlight on page \d+ \| location \d+-\d+).*$'
+)
+
 # ============================================================================
 # SCRIPT 1: Parse My Clippings.txt to Individual Files
 # ============================================================================
 
 def clean_file_content(file_path):
     """Remove bookmarks from the clippings file"""
-    with open(file_path, "r", encoding="utf-8") as file:
-        content = file.read()
+    with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+        content = file.read().lstrip('\ufeff')
 
-    lines = content.split("\n")
     new_lines = []
-    last_bookmark_position = -1
+    pending = None  # Last kept line, held back in case a bookmark follows it
+    skip_remaining = 0
+
+    for line in content.split("\n"):
+        if "Your Bookmark" in line:
+            # Drop the book title line above and the rest of the entry below
+            pending = None
+            skip_remaining = 3
+            continue
+        if skip_remaining > 0:
+            skip_remaining -= 1
+            continue
+        if pending is not None:
+            new_lines.append(pending)
+        pending = line
 
-    for i, line in enumerate(lines):
-        if ("Your Bookmark" in line):
-            new_lines.pop()
-            last_bookmark_position = i
-        if (last_bookmark_position == -1 or not i - last_bookmark_position < 4):
-            new_lines.append(line)
+    if pending is not None:
+        new_lines.append(pending)
 
     return "\n".join(new_lines)
 
@@ -37,26 +61,22 @@ def clean_file_content(file_path):
 def parse_clippings(content):
     """Parse clippings and organize by book"""
     books = {}
-    pattern = r"(.*?) \((.*?)\)\n- (Your Highlight on .*? \| location .*?|Your Highlight at location .*?|Your Highlight on page .*?|Highlight on Page .*?)\n\n(.*?)\n=========="
-    matches = re.findall(pattern, content, re.DOTALL)
-    
-    for match in matches:
-        book_title = match[0].strip().encode('utf-8').decode('utf-8-sig').strip()
-        author = match[1].strip()
-        highlight_source = match[2].strip()
-        highlight_text = match[3].strip()
-        
-        page_info = ''
-        location_info = ''
-        if 'page' in highlight_source.lower():
-            page_info = highlight_source.split('|')[0].replace('Your Highlight on ', '').strip()
-            location_info = highlight_source.split('|')[1].replace('location', '').strip()
-        elif 'location' in highlight_source.lower():
-            location_info = highlight_source.split('|')[0].replace('Your Highlight at ', '').strip()
-        
-        if book_title not in books:
-            books[book_title] = []
-        books[book_title].append((highlight_text, author, page_info, location_info))
+    # Whatever follows the last separator is never a complete entry
+    records = content.split("\n==========")[:-1]
+    
+    for record in records:
+        match = _CLIPPING_RE.match(record)
+        if not match:
+            continue
+        d = match.groupdict()
+        # Kindle prefixes every entry's title with a BOM, not just the first
+        book_title = d['title'].strip().lstrip('\ufeff').strip()
+        author = d['author'].strip()
+        highlight_text = d['text'].strip()
+        page_info = (d['page'] or d['on_page'] or d['old_page'] or '').strip()
+        location_info = (d['loc'] or d['at_loc'] or d['old_loc'] or '').strip()
+        
+        books.setdefault(book_title, []).append((highlight_text, author, page_info, location_info))
     
     return books
 
@@ -68,12 +88,15 @@ def save_highlights_to_files(books, output_dir='Highlights_by_Book'):
     
     for book_title, highlights in books.items():
         stripped_title = book_title.split(':')[0].strip()
-        file_name = re.sub(r'[<>:"/\\|?*]', '', stripped_title) + '.txt'
+        file_name = _FILENAME_SANITIZE_RE.sub('', stripped_title) + '.txt'
         file_path = os.path.join(output_dir, file_name)
         
+        body = ''.join(
+            f"{i}. {highlight_text}\n\t<{book_title}>({author}) Your Highlight on {page_info} | location {location}\n\n"
+            for i, (highlight_text, author, page_info, location) in enumerate(highlights, start=1)
+        )
         with open(file_path, 'w', encoding='utf-8') as file:
-            for i, (highlight_text, author, page_info, location) in enumerate(highlights, start=1):
-                file.write(f"{i}. {highlight_text}\n\t<{book_title}>({author}) Your Highlight on {page_info} | location {location}\n\n")
+            file.write(body)
         
         results.append((stripped_title, len(highlights)))
     
@@ -86,7 +109,7 @@ def save_highlights_to_files(books, output_dir='Highlights_by_Book'):
 
 def extract_book_info(text):
     """Extract book name and author from text"""
-    match = re.search(r'<([^>]*)>\(([^)]*)\)', text)
+    match = _BOOK_INFO_RE.search(text)
     if match:
         book_name = match.group(1).split(':')[0].strip()
         author = match.group(2).strip()
@@ -97,16 +120,12 @@ def extract_book_info(text):
 def format_highlights(text, book_name, author):
     """Format highlights with separators and remove metadata"""
     header = f"{book_name}\n{author}\n\n---\n\n"
-    text = re.sub(r'\n{2,}', '\n\n---\n\n', text)
-    highlights = re.split(r'\n{2,}', text)
+    highlights = _PARA_SPLIT_RE.split(text)
     formatted_highlights = []
 
     for highlight in highlights:
         if highlight.strip() and '<' in highlight and '>' in highlight:
-            clean_highlight = re.sub(
-                r'<.*?>\s*\(.*?\)\s*(Your Highlight on page \d+|Highlight on Page \d+ \| Loc\..*|Your Highlight at location \d+-\d+|Your Highlight on page \d+ \| location \d+-\d+).*$',
-                '', highlight
-            ).strip()
+            clean_highlight = _META_TRAILER_RE.sub('', highlight).strip()
             if clean_highlight:
                 formatted_highlights.append(clean_highlight)
 
@@ -114,38 +133,58 @@ def format_highlights(text, book_name, author):
 
 
 def read_file_with_encoding(filename):
-    """Read file with various encodings"""
-    encodings = ['utf-8', 'utf-8-sig', 'cp1252', 'iso-8859-1']
-    for encoding in encodings:
+    """Read file once, detecting the encoding from its BOM; returns (text, encoding)"""
+    with open(filename, 'rb') as file:
+        raw = file.read()
+
+    if raw.startswith(b'\xef\xbb\xbf'):
+        text = raw[3:].decode('utf-8', errors='replace')
+        encoding = 'utf-8-sig'
+    elif raw.startswith((b'\xff\xfe', b'\xfe\xff')):
+        text = raw.decode('utf-16', errors='replace')
+        encoding = 'utf-16'
+    else:
         try:
-            with open(filename, 'r', encoding=encoding) as file:
-                text = file.read()
-            return text.lstrip('\ufeff')
+            text = raw.decode('utf-8')
+            encoding = 'utf-8'
         except UnicodeDecodeError:
-            continue
-    raise ValueError("Could not read the file with any known encoding.")
+            text = raw.decode('cp1252', errors='replace')
+            encoding = 'cp1252'
+
+    # Binary mode skips universal newlines, so normalise line endings here
+    return text.replace('\r\n', '\n').replace('\r', '\n').lstrip('\ufeff'), encoding
+
+
+def files_to_simplify(input_dir, simple_dir):
+    """List highlight files whose simplified copy is missing or older than the source"""
+    with os.scandir(simple_dir) as entries:
+        simplified = {entry.name: entry.stat().st_mtime for entry in entries
+                      if entry.is_file() and entry.name.endswith('.txt')}
+    
+    with os.scandir(input_dir) as entries:
+        return [entry for entry in entries
+                if entry.is_file() and entry.name.endswith('.txt')
+                and simplified.get(entry.name, -1) <= entry.stat().st_mtime]
 
 
 def simplify_highlights(input_dir='Highlights_by_Book'):
-    """Simplify all highlight files in directory"""
+    """Simplify new or changed highlight files in directory"""
     # Output goes to a sibling folder named 'Highlights_by_Book_(Simple)'
     parent_dir = os.path.dirname(input_dir) or '.'
     simple_dir = os.path.join(parent_dir, 'Highlights_by_Book_(Simple)')
     os.makedirs(simple_dir, exist_ok=True)
 
     results = []
-    for filename in os.listdir(input_dir):
-        if filename.endswith('.txt'):
-            filepath = os.path.join(input_dir, filename)
-            text = read_file_with_encoding(filepath)
-            
-            book_name, author = extract_book_info(text)
-            if book_name and author:
-                formatted_text = format_highlights(text, book_name, author)
-                output_filename = os.path.join(simple_dir, filename)
-                with open(output_filename, 'w', encoding='utf-8') as output_file:
-                    output_file.write(formatted_text)
-                results.append(book_name)
+    for entry in files_to_simplify(input_dir, simple_dir):
+        text, _ = read_file_with_encoding(entry.path)
+        
+        book_name, author = extract_book_info(text)
+        if book_name and author:
+            formatted_text = format_highlights(text, book_name, author)
+            output_filename = os.path.join(simple_dir, entry.name)
+            with open(output_filename, 'w', encoding='utf-8') as output_file:
+                output_file.write(formatted_text)
+            results.append(book_name)
     
     return results
 
@@ -154,13 +193,53 @@ def simplify_highlights(input_dir='Highlights_by_Book'):
 # GUI Application
 # ============================================================================
 
+# Set this environment variable to skip loading tkinterdnd2 altogether
+_NO_DND_ENV = "KLIPPINGS_NO_DND"
+_dnd_cache = None
+
+
+def load_dnd():
+    """Import tkinterdnd2 on first use and return (TkinterDnD, DND_FILES)"""
+    global _dnd_cache
+    if _dnd_cache is None:
+        _dnd_cache = (None, None)
+        if not os.environ.get(_NO_DND_ENV):
+            try:
+                from tkinterdnd2 import DND_FILES, TkinterDnD
+                _dnd_cache = (TkinterDnD, DND_FILES)
+            except ImportError:
+                pass
+    return _dnd_cache
+
+
+def file_mtime(path):
+    """Return the file's modification time, or None if it can't be read"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def read_config(path, mtime):
+    """Read the JSON config file, cached until its modification time changes"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
 class KindleHighlightsGUI:
+    # Book list sizes in unscaled pixels, multiplied by customtkinter's widget scaling
+    BOOK_LIST_HEIGHT = 160
+    BOOK_ROW_HEIGHT = 28
+    BOOK_FONT_SIZE = 13
+    
     def __init__(self):
         # Set appearance mode and color theme
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
         
         # Create main window with drag-drop support if available
+        TkinterDnD, DND_FILES = load_dnd()
         if TkinterDnD:
             # Create TkinterDnD root first
             root = TkinterDnD.Tk()
@@ -172,6 +251,7 @@ class KindleHighlightsGUI:
             self._tk_root = root
         else:
             self.root = ctk.CTk()
+            self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
             self._tk_root = None
         
         self.root.title("Klippings")
@@ -179,12 +259,19 @@ class KindleHighlightsGUI:
         
         # Load saved preferences
         self.config_file = os.path.join(os.path.expanduser("~"), ".kindle_highlights_config.json")
+        self._prefs_flush_id = None
         self.load_preferences()
         
         # Processing control
         self.is_processing = False
+        self.is_parsing = False
+        self.parse_generation = 0  # Bumped per parse request; older results are dropped
         self.cancel_requested = False
         
+        # Log messages are buffered and flushed to the textbox in batches
+        self._log_buffer = collections.deque()
+        self._log_scheduled = False
+        
         # Configure grid
         self.root.grid_columnconfigure(0, weight=1)
         self.root.grid_rowconfigure(0, weight=1)
@@ -266,6 +353,16 @@ class KindleHighlightsGUI:
         )
         self.browse_button.grid(row=1, column=2, padx=(8, 20), pady=(0, 14), sticky="e")
         
+        # Parsing indicator (shown while the file is parsed in the background)
+        self.parse_status_label = ctk.CTkLabel(
+            self.file_frame,
+            text="⏳ Parsing books...",
+            font=ctk.CTkFont(size=12),
+            text_color=("gray40", "gray60")
+        )
+        self.parse_status_label.grid(row=2, column=0, columnspan=3, padx=20, pady=(0, 12), sticky="w")
+        self.parse_status_label.grid_remove()  # Hidden by default
+        
         # Book selection frame (initially hidden)
         self.book_selection_frame = ctk.CTkFrame(self.main_scroll_frame, corner_radius=15)
         self.book_selection_frame.grid(row=4, column=0, padx=40, pady=(0, 12), sticky="ew")
@@ -309,19 +406,46 @@ class KindleHighlightsGUI:
         )
         self.select_none_button.grid(row=0, column=1, padx=5)
         
-        # Scrollable frame for book checkboxes
-        self.books_scroll_frame = ctk.CTkScrollableFrame(
+        # Book list drawn on a single canvas - only the visible rows are rendered,
+        # so large libraries don't create one checkbox widget per book
+        self.books_list_frame = ctk.CTkFrame(
             self.book_selection_frame,
-            height=160,
             corner_radius=10,
             fg_color=("gray90", "gray17")
         )
-        self.books_scroll_frame.grid(row=2, column=0, padx=20, pady=(0, 14), sticky="ew")
-        self.books_scroll_frame.grid_columnconfigure(0, weight=1)
+        self.books_list_frame.grid(row=2, column=0, padx=20, pady=(0, 14), sticky="ew")
+        self.books_list_frame.grid_columnconfigure(0, weight=1)
+        
+        self.books_canvas = tk.Canvas(
+            self.books_list_frame,
+            height=self.BOOK_LIST_HEIGHT,
+            bg=self._theme_color(("gray90", "gray17")),
+            highlightthickness=0,
+            borderwidth=0,
+            yscrollincrement=self.BOOK_ROW_HEIGHT
+        )
+        self.books_canvas.grid(row=0, column=0, padx=(10, 0), pady=8, sticky="ew")
+        
+        self.books_scrollbar = ctk.CTkScrollbar(self.books_list_frame, command=self.scroll_books)
+        self.books_scrollbar.grid(row=0, column=1, padx=(0, 4), pady=8, sticky="ns")
+        self.books_canvas.configure(yscrollcommand=self.books_scrollbar.set)
+        
+        self.books_canvas.bind("<Configure>", lambda event: self.draw_visible_books())
+        self.books_canvas.bind("<Button-1>", self.toggle_book_at)
+        self.books_canvas.bind("<MouseWheel>", self.on_books_mousewheel)
+        self.books_canvas.bind("<Button-4>", self.on_books_mousewheel)  # Linux scroll up
+        self.books_canvas.bind("<Button-5>", self.on_books_mousewheel)  # Linux scroll down
+        
+        # A plain canvas isn't scaled by customtkinter, so follow its scaling by hand
+        self.book_font_family = ctk.CTkFont().cget("family")
+        self.update_book_list_scaling(ctk.ScalingTracker.get_widget_scaling(self.books_canvas))
+        ctk.ScalingTracker.add_widget(self.on_book_list_scaling, self.books_canvas)
         
-        # Dictionary to store book checkboxes
+        # Selection state per book title, and the full parsed book data
         self.book_vars = {}
-        self.book_data = {}  # Store full book data
+        self.book_titles = []
+        self.book_data = {}
+        self.book_data_source = None  # (path, mtime) the book data was parsed from
         
         # Output directory frame
         self.output_frame = ctk.CTkFrame(self.main_scroll_frame, corner_radius=15)
@@ -464,36 +588,45 @@ class KindleHighlightsGUI:
         self.clear_button.grid(row=9, column=0, padx=40, pady=(0, 24), sticky="ew")
         
         # Initial message
-        self.log("┌─────────────────────────────────┐")
-        self.log("│  Welcome to Klippings!          │")
-        self.log("└─────────────────────────────────┘\n")
-        self.log("📋 Instructions:")
-        self.log("  1. Select 'My Clippings.txt' (Browse or drag & drop)")
-        self.log("  2. Choose output directory (remembers last selection)")
-        self.log("  3. Select processing steps and click 'Start Processing'\n")
-        if not TkinterDnD:
-            self.log("⚠️  Drag & drop not available (tkinterdnd2 not installed)")
-            self.log("   Install with: pip install tkinterdnd2\n")
+        self.log("\n".join([
+            "┌─────────────────────────────────┐",
+            "│  Welcome to Klippings!          │",
+            "└─────────────────────────────────┘\n",
+            "📋 Instructions:",
+            "  1. Select 'My Clippings.txt' (Browse or drag & drop)",
+            "  2. Choose output directory (remembers last selection)",
+            "  3. Select processing steps and click 'Start Processing'\n"
+        ]))
+        if not TkinterDnD and not os.environ.get(_NO_DND_ENV):
+            self.log("⚠️  Drag & drop not available (tkinterdnd2 not installed)\n"
+                     "   Install with: pip install tkinterdnd2\n")
         self.log("Ready to process your highlights! ✨\n")
         
     def load_preferences(self):
         """Load saved preferences from config file"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    self.last_output_dir = config.get('last_output_dir', os.getcwd())
-            else:
-                self.last_output_dir = os.getcwd()
+            config = read_config(self.config_file, os.path.getmtime(self.config_file))
+            self._prefs = dict(config)
         except:
-            self.last_output_dir = os.getcwd()
+            self._prefs = {}
+        self.last_output_dir = self._prefs.get('last_output_dir', os.getcwd())
     
     def save_preferences(self):
-        """Save preferences to config file"""
+        """Update preferences and schedule a write to the config file"""
+        self._prefs['last_output_dir'] = self.output_path_var.get()
+        # Coalesce bursts of changes into a single write
+        if self._prefs_flush_id is not None:
+            self.root.after_cancel(self._prefs_flush_id)
+        self._prefs_flush_id = self.root.after(1000, self._flush_preferences)
+    
+    def _flush_preferences(self):
+        """Write preferences to the config file, replacing it atomically"""
+        self._prefs_flush_id = None
         try:
-            config = {'last_output_dir': self.output_path_var.get()}
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f)
+            tmp_file = self.config_file + ".tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(self._prefs, f)
+            os.replace(tmp_file, self.config_file)
         except:
             pass
     
@@ -523,7 +656,7 @@ class KindleHighlightsGUI:
             self.log(f"📁 File dropped: {os.path.basename(file_path)}")
             self.parse_and_show_books(file_path)
         else:
-            messagebox.showerror("Invalid File", "Please drop a valid .txt file")
+            self._error("Invalid File", "Please drop a valid .txt file")
         
     def cancel_processing(self):
         """Cancel the current processing operation"""
@@ -544,65 +677,213 @@ class KindleHighlightsGUI:
             self.parse_and_show_books(filename)
     
     def parse_and_show_books(self, filepath):
-        """Parse the clippings file and display book selection"""
+        """Parse the clippings file in the background and display book selection"""
+        # Any parse still running is now stale, whichever branch is taken below
+        self.parse_generation += 1
+        
+        if self.book_data_source == (filepath, file_mtime(filepath)):
+            # Same unchanged file as the one already listed - keep the current selection
+            self._finish_parse()
+            self.log(f"✓ Already loaded {len(self.book_data)} books from this file.\n")
+            return
+        
+        self.is_parsing = True
+        self.parse_status_label.grid()
+        self.log("📖 Parsing books from file...")
+        threading.Thread(
+            target=self._parse_in_background,
+            args=(self.parse_generation, filepath),
+            daemon=True
+        ).start()
+    
+    def _parse_in_background(self, generation, filepath):
+        """Read and parse the clippings file off the GUI thread"""
         try:
-            self.log("📖 Parsing books from file...")
-            content = clean_file_content(filepath)
-            books = parse_clippings(content)
-            
-            # Clear existing checkboxes
-            for widget in self.books_scroll_frame.winfo_children():
-                widget.destroy()
-            self.book_vars.clear()
-            self.book_data = books
-            
-            # Create checkboxes for each book
-            for i, (book_title, highlights) in enumerate(books.items()):
-                var = tk.BooleanVar(value=True)  # Default to selected
-                self.book_vars[book_title] = var
-                
-                # Create checkbox with book title and highlight count
-                checkbox = ctk.CTkCheckBox(
-                    self.books_scroll_frame,
-                    text=f"{book_title} ({len(highlights)} highlights)",
-                    variable=var,
-                    font=ctk.CTkFont(size=13),
-                    checkbox_width=22,
-                    checkbox_height=22
-                )
-                checkbox.grid(row=i, column=0, padx=15, pady=5, sticky="w")
-            
-            # Show the book selection frame
-            self.book_selection_frame.grid()
-            
-            self.log(f"✓ Found {len(books)} books. Select which ones to process.\n")
-            
+            mtime = file_mtime(filepath)
+            books = parse_clippings(clean_file_content(filepath))
         except Exception as e:
-            self.log(f"✗ Error parsing books: {str(e)}")
-            messagebox.showerror("Parse Error", f"Could not parse books:\n{str(e)}")
+            self.root.after(0, self._parse_failed, generation, str(e))
+        else:
+            self.root.after(0, self._populate_books, generation, filepath, mtime, books)
+    
+    def _finish_parse(self):
+        """Clear the parsing state and hide the parsing indicator"""
+        self.is_parsing = False
+        self.parse_status_label.grid_remove()
+    
+    def _populate_books(self, generation, filepath, mtime, books):
+        """Show the parsed books for selection (runs on the GUI thread)"""
+        if generation != self.parse_generation:
+            # Superseded by a newer request, which owns the parsing state:
+            # it has either finished already or will clear it when it does
+            return
+        self._finish_parse()
+        
+        # All books start selected
+        self.book_data = books
+        self.book_data_source = (filepath, mtime)
+        self.book_titles = list(books)
+        self.book_vars = dict.fromkeys(self.book_titles, True)
+        
+        # Show the book selection frame
+        self.book_selection_frame.grid()
+        self.books_canvas.yview_moveto(0)
+        self.draw_visible_books()
+        
+        self.log(f"✓ Found {len(books)} books. Select which ones to process.\n")
+    
+    def _refresh_book_data(self, generation, filepath, mtime, books):
+        """Replace the cached books after Step 1 re-read the file (runs on the GUI thread)"""
+        if generation != self.parse_generation:
+            return  # Another file was picked in the meantime
+        self.book_data = books
+        self.book_data_source = (filepath, mtime)
+        # Keep the current selection; books that weren't listed before stay unselected
+        self.book_titles = list(books)
+        self.book_vars = {book_title: self.book_vars.get(book_title, False) for book_title in books}
+        self.draw_visible_books()
+    
+    def _parse_failed(self, generation, error):
+        """Report a parse error (runs on the GUI thread)"""
+        if generation != self.parse_generation:
+            return  # Superseded by a newer request
+        self._finish_parse()
+        self.log(f"✗ Error parsing books: {error}")
+        self._error("Parse Error", f"Could not parse books:\n{error}")
+    
+    def _error(self, title, message):
+        """Show an error dialog from the GUI thread's event loop"""
+        self.root.after(0, messagebox.showerror, title, message)
+    
+    def _warning(self, title, message):
+        """Show a warning dialog from the GUI thread's event loop"""
+        self.root.after(0, messagebox.showwarning, title, message)
+    
+    def _theme_color(self, color):
+        """Pick the light or dark variant of a (light, dark) color pair"""
+        return color[0] if ctk.get_appearance_mode() == "Light" else color[1]
+    
+    def update_book_list_scaling(self, scaling):
+        """Derive the book list's pixel sizes and font from a widget scaling factor"""
+        self.book_scaling = scaling
+        self.book_row_height = round(self.BOOK_ROW_HEIGHT * scaling)
+        self.book_font = (self.book_font_family, -round(self.BOOK_FONT_SIZE * scaling))
+        self.books_canvas.configure(
+            height=round(self.BOOK_LIST_HEIGHT * scaling),
+            yscrollincrement=self.book_row_height
+        )
+    
+    def on_book_list_scaling(self, widget_scaling, window_scaling):
+        """Rescale the book list when customtkinter's scaling changes"""
+        self.update_book_list_scaling(widget_scaling)
+        self.draw_visible_books()
+    
+    def draw_visible_books(self):
+        """Redraw the book rows currently scrolled into view"""
+        canvas = self.books_canvas
+        row_height = self.book_row_height
+        canvas.delete("all")
+        
+        canvas_height = canvas.winfo_height()
+        total_height = max(len(self.book_titles) * row_height, canvas_height)
+        canvas.configure(scrollregion=(0, 0, canvas.winfo_width(), total_height))
+        
+        top = canvas.canvasy(0)
+        first = int(top // row_height)
+        last = min(len(self.book_titles), int((top + canvas_height) // row_height) + 1)
+        
+        text_color = self._theme_color(("gray10", "gray90"))
+        border_color = self._theme_color(("gray40", "gray60"))
+        check_color = self._theme_color(("#3b8ed0", "#1f6aa5"))
+        
+        scaling = self.book_scaling
+        box_left, box_right = round(6 * scaling), round(26 * scaling)
+        box_top, box_bottom = round(4 * scaling), round(24 * scaling)
+        box_border = max(1, round(2 * scaling))
+        check_x, text_x, text_y = round(16 * scaling), round(36 * scaling), round(14 * scaling)
+        
+        for i in range(first, last):
+            book_title = self.book_titles[i]
+            selected = self.book_vars[book_title]
+            y = i * row_height
+            
+            canvas.create_rectangle(
+                box_left, y + box_top, box_right, y + box_bottom,
+                outline=check_color if selected else border_color,
+                fill=check_color if selected else "",
+                width=box_border
+            )
+            if selected:
+                canvas.create_text(check_x, y + text_y, text="✓", fill="white", font=self.book_font)
+            canvas.create_text(
+                text_x, y + text_y,
+                text=f"{book_title} ({len(self.book_data[book_title])} highlights)",
+                anchor="w",
+                fill=text_color,
+                font=self.book_font
+            )
+    
+    def scroll_books(self, *args):
+        """Scroll the book list from the scrollbar"""
+        self.books_canvas.yview(*args)
+        self.draw_visible_books()
+    
+    def on_books_mousewheel(self, event):
+        """Scroll the book list with the mouse wheel"""
+        if event.num == 4 or event.delta > 0:
+            self.books_canvas.yview_scroll(-1, "units")
+        else:
+            self.books_canvas.yview_scroll(1, "units")
+        self.draw_visible_books()
+        return "break"  # Don't also scroll the main window
+    
+    def toggle_book_at(self, event):
+        """Toggle the book under the mouse pointer"""
+        index = int(self.books_canvas.canvasy(event.y) // self.book_row_height)
+        if 0 <= index < len(self.book_titles):
+            book_title = self.book_titles[index]
+            self.book_vars[book_title] = not self.book_vars[book_title]
+            self.draw_visible_books()
     
     def select_all_books(self):
         """Select all books"""
-        for var in self.book_vars.values():
-            var.set(True)
+        self.book_vars = dict.fromkeys(self.book_titles, True)
+        self.draw_visible_books()
         self.log("✓ All books selected")
     
     def select_none_books(self):
         """Deselect all books"""
-        for var in self.book_vars.values():
-            var.set(False)
+        self.book_vars = dict.fromkeys(self.book_titles, False)
+        self.draw_visible_books()
         self.log("○ All books deselected")
         
     def log(self, message):
         """Add message to log"""
+        self._log_buffer.append(message)
+        if not self._log_scheduled:
+            self._log_scheduled = True
+            self.root.after(100, self._flush_log)
+    
+    def log_header(self, title):
+        """Add a section banner to log as a single message"""
+        self.log(f"\n{'═' * 63}\n{title}\n{'═' * 63}")
+    
+    def _flush_log(self):
+        """Write all buffered log messages to the textbox at once"""
+        self._log_scheduled = False
+        messages = []
+        while self._log_buffer:
+            messages.append(self._log_buffer.popleft())
+        if not messages:
+            return
         self.log_text.configure(state="normal")
-        self.log_text.insert("end", message + "\n")
+        self.log_text.insert("end", "\n".join(messages) + "\n")
         self.log_text.see("end")
         self.log_text.configure(state="disabled")
-        self.root.update_idletasks()
         
     def clear_log(self):
         """Clear the log"""
+        self._log_buffer.clear()
         self.log_text.configure(state="normal")
         self.log_text.delete("1.0", "end")
         self.log_text.configure(state="disabled")
@@ -610,15 +891,22 @@ class KindleHighlightsGUI:
     def validate_prerequisites(self):
         """Check if required files exist"""
         if self.script1_var.get():
+            if self.is_parsing:
+                self._warning(
+                    "Still Parsing",
+                    "⏳ Your clippings file is still being parsed. Please wait a moment."
+                )
+                return False
+            
             clippings_path = self.file_path_var.get()
             if clippings_path == "No file selected - Click Browse or drag & drop file here" or not clippings_path:
-                messagebox.showerror(
+                self._error(
                     "Missing File", 
                     "❌ No file selected!\n\nPlease browse or drag & drop your 'My Clippings.txt' file."
                 )
                 return False
             if not os.path.exists(clippings_path):
-                messagebox.showerror(
+                self._error(
                     "File Not Found", 
                     f"❌ Selected file not found:\n\n{clippings_path}"
                 )
@@ -626,15 +914,15 @@ class KindleHighlightsGUI:
             
             # Check if any books are selected
             if not self.book_data:
-                messagebox.showerror(
+                self._error(
                     "No Books Parsed",
                     "❌ Please select a My Clippings.txt file first to parse books."
                 )
                 return False
             
-            selected_count = sum(1 for var in self.book_vars.values() if var.get())
+            selected_count = sum(self.book_vars.values())
             if selected_count == 0:
-                messagebox.showwarning(
+                self._warning(
                     "No Books Selected",
                     "⚠️ Please select at least one book to process."
                 )
@@ -643,7 +931,7 @@ class KindleHighlightsGUI:
         # Check output directory
         output_dir = self.output_path_var.get()
         if not output_dir or not os.path.exists(output_dir):
-            messagebox.showerror(
+            self._error(
                 "Invalid Output Directory",
                 "❌ Please select a valid output directory!"
             )
@@ -653,7 +941,7 @@ class KindleHighlightsGUI:
             highlights_dir = os.path.join(output_dir, "Highlights_by_Book")
             if not os.path.exists(highlights_dir):
                 if not self.script1_var.get():
-                    messagebox.showerror(
+                    self._error(
                         "Missing Folder", 
                         "❌ Highlights_by_Book folder not found!\n\nPlease run Step 1 first or enable it."
                     )
@@ -664,7 +952,7 @@ class KindleHighlightsGUI:
     def start_processing(self):
         """Start the processing in a separate thread"""
         if not (self.script1_var.get() or self.script2_var.get()):
-            messagebox.showwarning("No Steps Selected", "⚠️ Please select at least one processing step!")
+            self._warning("No Steps Selected", "⚠️ Please select at least one processing step!")
             return
         
         if not self.validate_prerequisites():
@@ -691,35 +979,42 @@ class KindleHighlightsGUI:
                     self.log("\n❌ Processing cancelled by user")
                     return
                     
-                self.log("\n" + "═" * 63)
-                self.log("STEP 1: Parsing My Clippings.txt")
-                self.log("═" * 63)
+                self.log_header("STEP 1: Parsing My Clippings.txt")
                 
                 try:
                     clippings_path = self.file_path_var.get()
-                    self.log(f"Reading: {os.path.basename(clippings_path)}")
+                    self.log(f"Source: {os.path.basename(clippings_path)}")
+                    
+                    # Re-read the file if it was edited after the books were listed
+                    book_data = self.book_data
+                    mtime = file_mtime(clippings_path)
+                    if self.book_data_source != (clippings_path, mtime):
+                        self.log("⚠️  File changed since it was loaded - re-reading highlights "
+                                 "(newly added books are not selected)")
+                        generation = self.parse_generation
+                        book_data = parse_clippings(clean_file_content(clippings_path))
+                        self.root.after(0, self._refresh_book_data, generation, clippings_path, mtime, book_data)
                     
                     # Get selected books
-                    selected_books = {title: data for title, data in self.book_data.items() 
-                                     if self.book_vars.get(title, tk.BooleanVar(value=False)).get()}
+                    selected_books = {title: data for title, data in book_data.items() 
+                                     if self.book_vars.get(title, False)}
                     
                     if not selected_books:
                         self.log("\n⚠️  No books selected! Aborting.")
-                        messagebox.showwarning("No Books Selected", "Please select at least one book to process.")
+                        self._warning("No Books Selected", "Please select at least one book to process.")
                         return
                     
-                    self.log(f"Processing {len(selected_books)} of {len(self.book_data)} books...")
+                    self.log(f"Processing {len(selected_books)} of {len(book_data)} books...")
                     
                     # Save to Highlights_by_Book in output directory
                     output_dir = os.path.join(output_base, "Highlights_by_Book")
                     results = save_highlights_to_files(selected_books, output_dir)
                     
-                    self.log(f"\n✓ Successfully parsed {len(results)} books:")
-                    for title, count in results:
-                        if self.cancel_requested:
-                            self.log("\n❌ Processing cancelled by user")
-                            return
-                        self.log(f"  • {title}: {count} highlights")
+                    summary = "\n".join(f"  • {title}: {count} highlights" for title, count in results)
+                    self.log(f"\n✓ Successfully parsed {len(results)} books:\n{summary}")
+                    if self.cancel_requested:
+                        self.log("\n❌ Processing cancelled by user")
+                        return
                     
                     self.log(f"\n✓ Step 1 completed! Files saved to: {output_dir}")
                 except Exception as e:
@@ -732,32 +1027,39 @@ class KindleHighlightsGUI:
                     self.log("\n❌ Processing cancelled by user")
                     return
                     
-                self.log("\n" + "═" * 63)
-                self.log("STEP 2: Simplifying Highlights")
-                self.log("═" * 63)
+                self.log_header("STEP 2: Simplifying Highlights")
                 
                 try:
                     input_dir = os.path.join(output_base, "Highlights_by_Book")
                     simple_dir = os.path.join(output_base, "Highlights_by_Book_(Simple)")
                     os.makedirs(simple_dir, exist_ok=True)
                     
+                    encodings = collections.Counter()
+                    
+                    # Only files changed since their last simplification need work
+                    pending = files_to_simplify(input_dir, simple_dir)
+                    self.log(f"{len(pending)} new or changed files to simplify (up-to-date files are skipped)")
+                    
                     # Process files one by one with cancellation checks
-                    for filename in os.listdir(input_dir):
+                    for entry in pending:
                         if self.cancel_requested:
                             self.log("\n❌ Processing cancelled by user")
                             return
                             
-                        if filename.endswith('.txt'):
-                            filepath = os.path.join(input_dir, filename)
-                            text = read_file_with_encoding(filepath)
-                            
-                            book_name, author = extract_book_info(text)
-                            if book_name and author:
-                                formatted_text = format_highlights(text, book_name, author)
-                                output_filename = os.path.join(simple_dir, filename)
-                                with open(output_filename, 'w', encoding='utf-8') as output_file:
-                                    output_file.write(formatted_text)
-                                self.log(f"  ✓ Simplified: {book_name}")
+                        text, encoding = read_file_with_encoding(entry.path)
+                        encodings[encoding] += 1
+                        
+                        book_name, author = extract_book_info(text)
+                        if book_name and author:
+                            formatted_text = format_highlights(text, book_name, author)
+                            output_filename = os.path.join(simple_dir, entry.name)
+                            with open(output_filename, 'w', encoding='utf-8') as output_file:
+                                output_file.write(formatted_text)
+                            self.log(f"  ✓ Simplified: {book_name}")
+                    
+                    if set(encodings) - {'utf-8'}:
+                        summary = ", ".join(f"{enc}: {count}" for enc, count in encodings.items())
+                        self.log(f"\nℹ️  File encodings: {summary}")
                     
                     self.log(f"\n✓ Step 2 completed! Simplified files saved to: Highlights_by_Book_(Simple)")
                 except Exception as e:
@@ -765,35 +1067,38 @@ class KindleHighlightsGUI:
                     raise
             
             if not self.cancel_requested:
-                self.log("\n" + "═" * 63)
-                self.log("🎉 ALL PROCESSING COMPLETED SUCCESSFULLY!")
-                self.log("═" * 63)
-                self.log(f"\nRaw highlights:        {os.path.join(output_base, 'Highlights_by_Book')}")
-                self.log(f"Simplified highlights: {os.path.join(output_base, 'Highlights_by_Book_(Simple)')}")
+                self.log_header("🎉 ALL PROCESSING COMPLETED SUCCESSFULLY!")
+                self.log(f"\nRaw highlights:        {os.path.join(output_base, 'Highlights_by_Book')}\n"
+                         f"Simplified highlights: {os.path.join(output_base, 'Highlights_by_Book_(Simple)')}")
                 
-                self.root.after(0, lambda: messagebox.showinfo(
+                self.root.after(
+                    0, messagebox.showinfo,
                     "Success! 🎉", 
                     f"Processing completed successfully!\n\nCheck the output folder:\n{output_base}"
-                ))
+                )
             
         except Exception as e:
             self.log(f"\n\n❌ CRITICAL ERROR: {str(e)}")
-            self.root.after(0, lambda: messagebox.showerror(
+            self._error(
                 "Error", 
                 f"An error occurred during processing:\n\n{str(e)}\n\nCheck the log for details."
-            ))
+            )
         
         finally:
             self.is_processing = False
             self.cancel_requested = False
-            self.root.after(0, lambda: self.process_button.configure(
+            self.root.after(0, functools.partial(
+                self.process_button.configure,
                 state="normal",
                 text="▶ Start Processing"
             ))
-            self.root.after(0, lambda: self.cancel_button.configure(state="disabled"))
+            self.root.after(0, functools.partial(self.cancel_button.configure, state="disabled"))
     
     def on_closing(self):
         """Handle window closing"""
+        if self._prefs_flush_id is not None:
+            self.root.after_cancel(self._prefs_flush_id)
+            self._flush_preferences()
         if self._tk_root:
             self._tk_root.destroy()
         self.root.destroy()